@@ -62,22 +62,22 @@ def main():
     ticker = ['AMZN', 'IBM', 'TSLA']
     my_alpha_vantage_api_key = 'https://www.alphavantage.co/support/#api-key'
 
-    # Crea cliente
+    # Crea cliente (los datos se descargan en la primera consulta)
     try:
         tf_client = tf.TimeSeriesFinanceClient(ticker,
                                                my_alpha_vantage_api_key,
                                                logging_level=logging.INFO)
-    # Captura y muestra todas las excepciones
-    except Exception as e:
-        logger.error(f"{e}", exc_info=False)
-    # Usa el cliente
-    else:
+
         #   Tarea 3
         #   Filtra los datos para mostrar únicamente el año 2020
 
         # Genera una serie de Pandas con precio de cierre diario
         pd_series = tf_client.daily_volume(datetime.date(year=2020, month=1, day=1), datetime.date(year=2020, month=12, day=31))
-
+    # Captura y muestra todas las excepciones
+    except Exception as e:
+        logger.error(f"{e}", exc_info=False)
+    # Usa el cliente
+    else:
         logger.info(pd_series)
 
         # Dibuja una gráfica a partir de la serie de Pandas
@@ -33,5 +33,6 @@ setup(
     keywords=["teii"],
     packages=find_packages(exclude=['tests', 'tests.*']),   # excluye tests de .whl
     install_requires=read("requirements.txt"),              # depende de pandas y requests
+    extras_require={"async": ["httpx[http2]"]},             # peticiones asíncronas (HTTP/2) opcionales
     python_requires=">=3.7",                                # no compatible con 3.6
 )
@@ -5,6 +5,7 @@ from .exception import FinanceClientInvalidData
 from .exception import FinanceClientIOError
 from .exception import FinanceClientParamError
 
+from .cache import FileCache
 from .finance import FinanceClient
 from .timeseries import TimeSeriesFinanceClient
 
@@ -13,5 +14,6 @@ __all__ = ('FinanceClientInvalidAPIKey',
            'FinanceClientInvalidData',
            'FinanceClientIOError',
            'FinanceClientParamError',
+           'FileCache',
            'FinanceClient',
            'TimeSeriesFinanceClient')
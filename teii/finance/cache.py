@@ -0,0 +1,205 @@
+""" Cache classes """
+
+
+import hashlib
+import json
+import os
+import pandas as pd
+import requests
+import tempfile
+import time
+
+from pathlib import Path
+from typing import Optional, Union
+
+from teii.finance import FinanceClientIOError
+
+
+class FileCache:
+    """ File based cache of API responses.
+
+    Each response body is stored in '{path}/{md5(url)}.json' together with a
+    sidecar '{path}/{md5(url)}.meta' file that holds the fetch timestamp.
+    Processed data frames are stored in '{path}/{name}.parquet' (requires a
+    parquet engine such as pyarrow).
+
+    Attributes:
+    ----------
+    _path: Path
+        directory where the responses are stored
+    _ttl: float
+        time to live of the responses in seconds
+    DefaultPath: Path
+        Default cache directory
+    DefaultTTL: float
+        Default time to live in seconds (one day, data is daily)
+
+    Methods:
+    --------
+    _build_key(url)
+        Return the cache key of the URL
+    get(url)
+        Return the cached response of the URL
+    put(url, content)
+        Store the response body of the URL
+    get_frame(name)
+        Return the cached data frame 'name'
+    put_frame(name, data_frame)
+        Store the data frame 'name'
+    _write_atomic(path2file, content)
+        Write 'content' into 'path2file' atomically
+    """
+
+    DefaultPath = Path.home() / ".teii_cache"  # Class variable
+    DefaultTTL = 86400.0  # Class variable
+
+    def __init__(self,
+                 path: Optional[Union[str, Path]] = None,
+                 ttl: float = DefaultTTL) -> None:
+        """ FileCache constructor.
+        Parameters:
+        ----------
+        path: Union[str, Path], optional
+            directory where the responses are stored (default is DefaultPath)
+        ttl: float
+            time to live of the responses in seconds (default is DefaultTTL)
+        """
+
+        self._path = Path(path) if path is not None else self.DefaultPath
+        self._ttl = ttl
+
+    @staticmethod
+    def _build_key(url: str) -> str:
+        """ Return the cache key of the URL.
+        Parameters:
+        ----------
+        url: str
+            Contains the query URL
+
+        Returns:
+        -------
+        str
+            md5 hex digest of the URL
+        """
+
+        return hashlib.md5(url.encode("utf-8")).hexdigest()
+
+    def get(self, url: str) -> Optional[requests.Response]:
+        """ Return the cached response of the URL.
+        Parameters:
+        ----------
+        url: str
+            Contains the query URL
+
+        Returns:
+        -------
+        Response, optional
+            Response rebuilt from the cached body (marked with 'from_cache')
+            or None if there is no fresh entry
+        """
+
+        key = self._build_key(url)
+        try:
+            meta = json.loads((self._path / f"{key}.meta").read_text())
+            if time.time() - meta['ts'] >= self._ttl:
+                return None
+            content = (self._path / f"{key}.json").read_bytes()
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response._content = content
+        response.from_cache = True  # type: ignore[attr-defined]
+        return response
+
+    def put(self, url: str, content: bytes) -> None:
+        """ Store the response body of the URL.
+        Parameters:
+        ----------
+        url: str
+            Contains the query URL
+        content: bytes
+            Contains the response body
+
+        Raises:
+        ------
+        FinanceClientIOError
+            Unable to write the cache files
+        """
+
+        key = self._build_key(url)
+        try:
+            self._path.mkdir(parents=True, exist_ok=True)
+            self._write_atomic(self._path / f"{key}.json", content)
+            # El URL contiene la API key, no se guarda en claro
+            self._write_atomic(self._path / f"{key}.meta", json.dumps({'ts': time.time()}).encode("utf-8"))
+        except OSError as e:
+            raise FinanceClientIOError(f"Unable to write cache entry into '{self._path}'") from e
+
+    def get_frame(self, name: str) -> Optional[pd.DataFrame]:
+        """ Return the cached data frame 'name'.
+        Parameters:
+        ----------
+        name: str
+            Contains the name of the data frame
+
+        Returns:
+        -------
+        pd.DataFrame, optional
+            Cached data frame or None if there is no fresh entry
+        """
+
+        path2file = self._path / f"{name}.parquet"
+        try:
+            if time.time() - path2file.stat().st_mtime >= self._ttl:
+                return None
+            return pd.read_parquet(path2file)
+        except (OSError, ImportError, ValueError):
+            return None
+
+    def put_frame(self, name: str, data_frame: pd.DataFrame) -> None:
+        """ Store the data frame 'name'.
+        Parameters:
+        ----------
+        name: str
+            Contains the name of the data frame
+        data_frame: pd.DataFrame
+            Contains the data frame to store
+
+        Raises:
+        ------
+        FinanceClientIOError
+            Unable to write the parquet file
+        """
+
+        path2file = self._path / f"{name}.parquet"
+        tmp = path2file.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            self._path.mkdir(parents=True, exist_ok=True)
+            data_frame.to_parquet(tmp, compression='snappy')
+            os.replace(tmp, path2file)
+        except (OSError, ImportError, ValueError) as e:
+            if tmp.exists():
+                tmp.unlink()
+            raise FinanceClientIOError(f"Unable to write data frame into '{path2file}'") from e
+
+    def _write_atomic(self, path2file: Path, content: bytes) -> None:
+        """ Write 'content' into 'path2file' atomically.
+        Parameters:
+        ----------
+        path2file: Path
+            Contains the path to the file
+        content: bytes
+            Contains the data to write
+        """
+
+        fd, tmp = tempfile.mkstemp(dir=self._path, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(content)
+            os.replace(tmp, path2file)
+        except BaseException:
+            os.unlink(tmp)
+            raise
@@ -1,7 +1,9 @@
 """ Finance Client classes """
 
 
-import json
+import asyncio
+import importlib.util
+import itertools
 import logging
 import os
 import pandas as pd
@@ -9,13 +11,30 @@ import requests
 import typing
 
 from abc import ABC, abstractclassmethod, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from requests.adapters import HTTPAdapter
 from typing import Optional, Union
+from urllib3.util.retry import Retry
+
+try:
+    import httpx
+except ImportError:  # httpx es opcional, sin él las consultas se hacen con requests en varios hilos
+    httpx = None  # type: ignore
+
+try:
+    import orjson
+except ImportError:  # orjson es opcional, sin él se usa el decodificador json de la response
+    orjson = None  # type: ignore
 
 from teii.finance import FinanceClientInvalidAPIKey
 from teii.finance import FinanceClientAPIError
 from teii.finance import FinanceClientInvalidData
 from teii.finance import FinanceClientIOError
+from teii.finance import FileCache
+
+
+_HTTP2_SUPPORT = importlib.util.find_spec("h2") is not None
 
 
 class FinanceClient(ABC):
@@ -31,14 +50,28 @@ class FinanceClient(ABC):
         key to search the URLs (default is None)
     _logger: Logger
         logger of the class
-    _json_data: typing.List[dict]
-        contains the json data readed
-    _json_metadata: typing.List[dict]
-        contains the json metadata readed
-    _data_frame: typing.List[pd.DataFrame]
-        contains the list of json's data frames
+    _json_data: typing.Dict[str, dict]
+        contains the json data readed of each ticker
+    _json_metadata: typing.Dict[str, dict]
+        contains the json metadata readed of each ticker
+    _frames: typing.Dict[str, pd.DataFrame]
+        contains the data frame of each ticker (built on first use)
+    _query_urls: typing.Dict[str, str]
+        query URL of each ticker
+    _session: requests.Session
+        HTTP session shared by the API queries (connection pool and retries)
+    _cache: FileCache, optional
+        on-disk cache of the API responses (None if disabled)
     _FinanceBaseQueryURL: str
         Base query URL
+    _FinanceMaxWorkers: int
+        Maximum number of concurrent API queries when httpx is not available
+    _FinanceRetries: int
+        Maximum number of retries of a failed API query
+    _FinanceRetryBackoff: float
+        Backoff factor in seconds between retries (doubled on each retry)
+    _FinanceRetryStatus: typing.Tuple[int, ...]
+        HTTP status codes that are retried (rate limit and temporary errors)
 
     Methods:
     --------
@@ -48,18 +81,54 @@ class FinanceClient(ABC):
         Return base query URL
     _build_base_query_url_params(ticker)
         Return base query URL parameters.
+    _build_query_url(ticker)
+        Return query URL of the ticker
+    _frame_cache_name(ticker)
+        Return the name of the cached data frame of the ticker
+    _get_dataframe(ticker)
+        Return the data frame of the ticker
+    _get_dataframes(tickers)
+        Return the data frames of the tickers
+    _fetch(tickers)
+        Query, process and validate the data of the tickers
+    _query_api_all(tickers)
+        Query API endpoint for every ticker concurrently
+    _fetch_all(tickers)
+        Query API endpoint for every ticker with asynchronous requests
     _query_api(ticker)
         Query API endpoint
+    _query_url(url)
+        Query API endpoint URL
+    _supports_batch()
+        Return the maximum number of tickers per query
+    _build_batch_query_url_params(tickers)
+        Return base query URL parameters for a batch of tickers
+    _split_batch_response(response, tickers)
+        Split a batch response into per-ticker json data
+    _query_api_batch(tickers, batch_size)
+        Query API endpoint with batches of tickers
+    _check_query_data(ticker)
+        Validate the query data of the ticker, discarding it if it is invalid
+    _query_api_async(client, ticker)
+        Query API endpoint asynchronously (retrying rate-limited queries)
+    _retry_delay(attempt, response)
+        Return the seconds to wait before retrying a failed API query
+    _cache_response(url, response)
+        Store the validated response into the on-disk cache
     _build_query_metadata_key()
         Return metadata query key
     _build_query_data_key()
         Return data query key
-    _process_query_response(response)
-        Preprocess query data
-    _process_query_response(response)
+    _process_query_response(ticker, response)
         Preprocess query data
+    _process_query_data(ticker, json_data_downloaded)
+        Preprocess query json data
     _validate_query_data(ticker)
         Validate query data
+    _build_data_frame(ticker)
+        Build the data frame of the ticker from its json data
+    _prepare_data_frame(ticker, data_frame)
+        Prepare the data frame of the ticker before storing it
     to_pandas()
         Return pandas data frame from json data
     to_csv(path2file)
@@ -67,12 +136,22 @@ class FinanceClient(ABC):
     """
 
     _FinanceBaseQueryURL = "https://www.alphavantage.co/query?"  # Class variable
+    _FinanceMaxWorkers = 16  # Class variable
+    _FinanceRetries = 3  # Class variable
+    _FinanceRetryBackoff = 0.3  # Class variable
+    _FinanceRetryStatus = (429, 502, 503, 504)  # Class variable
 
     def __init__(self, ticker: typing.List[str],
                  api_key: Optional[str] = None,
                  logging_level: Union[int, str] = logging.WARNING,
-                 logging_file: Optional[str] = None) -> None:
+                 logging_file: Optional[str] = None,
+                 cache: bool = False,
+                 cache_ttl: float = FileCache.DefaultTTL) -> None:
         """ FinanceClient constructor.
+
+        The API is not queried here: the data of each ticker is downloaded
+        and processed the first time it is needed.
+
         Parameters:
         ----------
         ticker: typing.List[str]
@@ -83,6 +162,10 @@ class FinanceClient(ABC):
             defines the level of the logger (default is logging.WARNING)
         logging_file: str, optional
             file to print the log (default is None)
+        cache: bool
+            store the API responses on disk and reuse them (default is False)
+        cache_ttl: float
+            time to live of the cached responses in seconds (default is one day)
 
         Raises:
         -------
@@ -92,8 +175,10 @@ class FinanceClient(ABC):
 
         self._ticker = ticker
         self._api_key = api_key
-        self._json_data: typing.List[dict] = []
-        self._json_metadata: typing.List[dict] = []
+        self._json_data: typing.Dict[str, dict] = {}
+        self._json_metadata: typing.Dict[str, dict] = {}
+        self._frames: typing.Dict[str, pd.DataFrame] = {}
+        self._query_urls: typing.Dict[str, str] = {}
 
         # Logging configuration
         self._setup_logging(logging_level, logging_file)
@@ -105,21 +190,17 @@ class FinanceClient(ABC):
         if not self._api_key or not isinstance(self._api_key, str):
             raise FinanceClientInvalidAPIKey(f"{self.__class__.__qualname__} operation failed")
 
-        for t in self._ticker:
-            # Query Finance API obtiene response - necesita ticker
-            self._logger.info("Finance API access...")
-            response = self._query_api(t)
-
-            # Process query response - añade data y metadata a las listas - necesita response
-            self._logger.info("Finance API query response processing...")
-            self._process_query_response(response)
-
-            # Validate query data compara algo de su metada con el ticker - necesita ticker
-            self._logger.info("Finance API query data validation...")
-            self._validate_query_data(t)
+        # HTTP session (reuses connections between queries and retries rate-limited ones)
+        self._session = requests.Session()
+        self._session.mount("https://", HTTPAdapter(pool_connections=self._FinanceMaxWorkers,
+                                                    pool_maxsize=self._FinanceMaxWorkers,
+                                                    max_retries=Retry(total=self._FinanceRetries,
+                                                                      backoff_factor=self._FinanceRetryBackoff,
+                                                                      status_forcelist=self._FinanceRetryStatus,
+                                                                      raise_on_status=False)))
 
-        # Panda's Data Frame
-        self._data_frame: typing.List[pd.DataFrame] = []
+        # On-disk response cache
+        self._cache: Optional[FileCache] = FileCache(ttl=cache_ttl) if cache else None
 
     def _setup_logging(self,
                        logging_level: Union[int, str],
@@ -169,6 +250,183 @@ class FinanceClient(ABC):
 
         pass
 
+    def _build_query_url(self, ticker: str) -> str:
+        """ Return query URL of the ticker (memoized per instance).
+        Parameters:
+        ----------
+        ticker: str
+            Contain the ticker
+
+        Returns:
+        -------
+        str
+            Base query URL followed by the ticker query parameters
+        """
+
+        url = self._query_urls.get(ticker)
+        if url is None:
+            url = self._query_urls[ticker] = (f"{self.__class__._build_base_query_url()}"
+                                              f"{self._build_base_query_url_params(ticker)}")
+        return url
+
+    def _frame_cache_name(self, ticker: str) -> str:
+        """ Return the name of the cached data frame of the ticker.
+        Parameters:
+        ----------
+        ticker: str
+            Contain the ticker
+
+        Returns:
+        -------
+        str
+            Class name followed by the hash of the query URL, so the API key
+            and the query parameters select different entries
+        """
+
+        return f"{self.__class__.__name__}.{FileCache._build_key(self._build_query_url(ticker))}"
+
+    def _get_dataframe(self, ticker: str) -> pd.DataFrame:
+        """ Return the data frame of the ticker.
+        Parameters:
+        ----------
+        ticker: str
+            Contain the ticker
+
+        Returns:
+        -------
+        pd.DataFrame
+            Data frame of the ticker
+        """
+
+        return self._get_dataframes([ticker])[0]
+
+    def _get_dataframes(self, tickers: Optional[typing.List[str]] = None) -> typing.List[pd.DataFrame]:
+        """ Return the data frames of the tickers.
+
+        Data frames not built yet are loaded from the cache or built from
+        the API data, querying the API for all the missing tickers at once.
+
+        Parameters:
+        ----------
+        tickers: typing.List[str], optional
+            Contains the tickers (default is every ticker of the client)
+
+        Returns:
+        -------
+        typing.List[pd.DataFrame]
+            Data frames in ticker order
+
+        Raises:
+        ------
+        FinanceClientAPIError
+            Unsuccessful API access
+        FinanceClientInvalidData
+            The data is invalid
+        """
+
+        if tickers is None:
+            tickers = self._ticker
+
+        missing = [t for t in dict.fromkeys(tickers) if t not in self._frames]
+
+        # Cached data frames (skip querying, parsing and formatting)
+        built: typing.Dict[str, pd.DataFrame] = {}
+        if self._cache is not None:
+            for t in missing:
+                data_frame = self._cache.get_frame(self._frame_cache_name(t))
+                if data_frame is not None:
+                    self._logger.info(f"Cargado data frame cacheado del ticker '{t}'")
+                    built[t] = data_frame
+
+        to_fetch = [t for t in missing if t not in built and t not in self._json_data]
+        if to_fetch:
+            self._fetch(to_fetch)
+
+        for t in missing:
+            if t not in built:
+                built[t] = self._build_data_frame(t)
+                self._logger.info(f"Creado data frame del ticker '{t}'")
+                if self._cache is not None:
+                    try:
+                        self._cache.put_frame(self._frame_cache_name(t), built[t])
+                    except FinanceClientIOError as e:
+                        self._logger.warning(f"{e}")
+
+            self._frames[t] = self._prepare_data_frame(t, built[t])
+
+        return [self._frames[t] for t in tickers]
+
+    def _fetch(self, tickers: typing.List[str]) -> None:
+        """ Query, process and validate the data of the tickers.
+        Parameters:
+        ----------
+        tickers: typing.List[str]
+            Contains the tickers
+
+        Raises:
+        ------
+        FinanceClientAPIError
+            Unsuccessful API access
+        FinanceClientInvalidData
+            The data is invalid
+        """
+
+        batch_size = self._supports_batch()
+        if batch_size > 1:
+            # Query Finance API obtiene los datos de varios tickers en cada petición
+            self._logger.info("Finance API batch access...")
+            json_data, batch_responses = self._query_api_batch(tickers, batch_size)
+            for t, json_data_downloaded in zip(tickers, json_data):
+                self._logger.info("Finance API query data processing...")
+                self._process_query_data(t, json_data_downloaded)
+
+                self._logger.info("Finance API query data validation...")
+                self._check_query_data(t)
+
+            # Solo se cachean las responses cuyos datos son válidos (AlphaVantage devuelve errores con status 200)
+            for url, batch_response in batch_responses:
+                self._cache_response(url, batch_response)
+        else:
+            # Query Finance API obtiene las responses de todos los tickers de forma concurrente
+            self._logger.info("Finance API access...")
+            responses = self._query_api_all(tickers)
+
+            for t, response in zip(tickers, responses):
+                # Process query response - añade data y metadata del ticker - necesita response
+                self._logger.info("Finance API query response processing...")
+                self._process_query_response(t, response)
+
+                # Validate query data compara algo de su metada con el ticker - necesita ticker
+                self._logger.info("Finance API query data validation...")
+                self._check_query_data(t)
+
+                # Solo se cachean las responses cuyos datos son válidos (AlphaVantage devuelve errores con status 200)
+                self._cache_response(self._build_query_url(t), response)
+
+    def _check_query_data(self, ticker: str) -> None:
+        """ Validate the query data of the ticker, discarding it if it is invalid.
+
+        Invalid data is not kept, so the next query fetches it again instead
+        of building a data frame from data that was never validated.
+
+        Parameters:
+        ----------
+        ticker: str
+            Contain the ticker
+
+        Raises:
+        ------
+        FinanceClientInvalidData
+            The data is invalid
+        """
+
+        try:
+            self._validate_query_data(ticker)
+        except Exception:
+            self._json_data.pop(ticker, None)
+            self._json_metadata.pop(ticker, None)
+            raise
+
     def _query_api(self, t: str) -> requests.Response:
         """ Query API endpoint.
         Parameters:
@@ -187,17 +445,275 @@ class FinanceClient(ABC):
             Unsuccessful API access
         """
 
+        return self._query_url(self._build_query_url(t))
+
+    def _query_url(self, url: str) -> requests.Response:
+        """ Query API endpoint URL.
+        Parameters:
+        ----------
+        url: str
+            Contains the query URL
+
+        Returns:
+        -------
+        Response
+            Return the response of the request.
+
+        Raises:
+        ------
+        FinanceClientAPIError
+            Unsuccessful API access
+        """
+
+        if self._cache is not None:
+            cached_response = self._cache.get(url)
+            if cached_response is not None:
+                self._logger.info(f"Cached API response [URL: {url}]")
+                return cached_response
+
+        response = None
         try:
-            response = requests.get(f"{self.__class__._build_base_query_url()}{self._build_base_query_url_params(t)}")
+            response = self._session.get(url)
             assert response.status_code == 200
         except Exception as e:
-            raise FinanceClientAPIError(f"Unsuccessful API access "
-                                        f"[URL: {response.url}, status: {response.status_code}]") from e
+            # Sin response si la petición falla (p.ej. RetryError al agotar los reintentos)
+            status = response.status_code if response is not None else None
+            raise FinanceClientAPIError(f"Unsuccessful API access [URL: {url}, status: {status}]") from e
         else:
             self._logger.info(f"Successful API access "
                               f"[URL: {response.url}, status: {response.status_code}]")
+
         return response
 
+    def _supports_batch(self) -> int:
+        """ Return the maximum number of tickers per query.
+
+        Override in subclasses whose endpoint accepts several symbols per
+        query (together with '_build_batch_query_url_params' and
+        '_split_batch_response').
+
+        Returns:
+        -------
+        int
+            Maximum batch size (1 if batch queries are not supported)
+        """
+
+        return 1
+
+    def _build_batch_query_url_params(self, tickers: typing.List[str]) -> str:
+        """ Return base query URL parameters for a batch of tickers.
+        Parameters:
+        ----------
+        tickers: typing.List[str]
+            Contains the tickers of the batch
+
+        Raises:
+        ------
+        NotImplementedError
+            Batch queries are not supported
+        """
+
+        raise NotImplementedError(f"{self.__class__.__qualname__} does not support batch queries")
+
+    def _split_batch_response(self,
+                              response: requests.Response,
+                              tickers: typing.List[str]) -> typing.List[dict]:
+        """ Split a batch response into per-ticker json data.
+        Parameters:
+        ----------
+        response: Response
+            Contains the response of the batch request
+        tickers: typing.List[str]
+            Contains the tickers of the batch
+
+        Returns:
+        -------
+        typing.List[dict]
+            Json data of each ticker (same format as a single ticker query)
+
+        Raises:
+        ------
+        NotImplementedError
+            Batch queries are not supported
+        """
+
+        raise NotImplementedError(f"{self.__class__.__qualname__} does not support batch queries")
+
+    def _query_api_batch(self,
+                         tickers: typing.List[str],
+                         batch_size: int) -> typing.Tuple[typing.List[dict],
+                                                          typing.List[typing.Tuple[str, requests.Response]]]:
+        """ Query API endpoint with batches of 'batch_size' tickers.
+        Parameters:
+        ----------
+        tickers: typing.List[str]
+            Contains the tickers
+        batch_size: int
+            Maximum number of tickers per query
+
+        Returns:
+        -------
+        typing.List[dict]
+            Json data of each ticker in ticker order
+        typing.List[typing.Tuple[str, Response]]
+            Query URL and response of each batch (to cache them once validated)
+
+        Raises:
+        ------
+        FinanceClientAPIError
+            Unsuccessful API access
+        FinanceClientInvalidData
+            The batch response does not contain every ticker
+        """
+
+        batches = [tickers[i:i + batch_size] for i in range(0, len(tickers), batch_size)]
+        urls = [f"{self.__class__._build_base_query_url()}{self._build_batch_query_url_params(b)}" for b in batches]
+
+        max_workers = max(1, min(self._FinanceMaxWorkers, len(urls)))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            responses = list(executor.map(self._query_url, urls))
+
+        json_data: typing.List[dict] = []
+        for batch, response in zip(batches, responses):
+            batch_json_data = self._split_batch_response(response, batch)
+            if len(batch_json_data) != len(batch):
+                raise FinanceClientInvalidData(f"Batch response does not contain tickers {batch}")
+            json_data.extend(batch_json_data)
+
+        return json_data, list(zip(urls, responses))
+
+    def _query_api_all(self, tickers: typing.List[str]) -> typing.List[typing.Any]:
+        """ Query API endpoint for every ticker concurrently.
+
+        Uses asynchronous requests when httpx is available and there is no
+        running event loop; otherwise falls back to a thread pool.
+
+        Parameters:
+        ----------
+        tickers: typing.List[str]
+            Contains the tickers
+
+        Returns:
+        -------
+        List[Response]
+            Return the responses of the requests in ticker order.
+        """
+
+        if httpx is not None:
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                return asyncio.run(self._fetch_all(tickers))
+
+        max_workers = max(1, min(self._FinanceMaxWorkers, len(tickers)))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(self._query_api, tickers))
+
+    async def _fetch_all(self, tickers: typing.List[str]) -> typing.List[typing.Any]:
+        """ Query API endpoint for every ticker with asynchronous requests.
+        Parameters:
+        ----------
+        tickers: typing.List[str]
+            Contains the tickers
+
+        Returns:
+        -------
+        List[httpx.Response]
+            Return the responses of the requests in ticker order.
+        """
+
+        async with httpx.AsyncClient(http2=_HTTP2_SUPPORT) as client:
+            return await asyncio.gather(*[self._query_api_async(client, t) for t in tickers])
+
+    async def _query_api_async(self, client: typing.Any, t: str) -> typing.Any:
+        """ Query API endpoint asynchronously.
+        Parameters:
+        ----------
+        client: httpx.AsyncClient
+            Client used to send the request
+        t: str
+            Contain the ticker
+
+        Returns:
+        -------
+        httpx.Response
+            Return the response of the request.
+
+        Raises:
+        ------
+        FinanceClientAPIError
+            Unsuccessful API access
+        """
+
+        url = self._build_query_url(t)
+        if self._cache is not None:
+            cached_response = self._cache.get(url)
+            if cached_response is not None:
+                self._logger.info(f"Cached API response [URL: {url}]")
+                return cached_response
+
+        # Misma política de reintentos que el HTTPAdapter de la requests.Session
+        for attempt in range(self._FinanceRetries + 1):
+            response = None
+            try:
+                response = await client.get(url)
+                assert response.status_code == 200
+            except Exception as e:
+                status = response.status_code if response is not None else None
+                if attempt == self._FinanceRetries or (status is not None and status not in self._FinanceRetryStatus):
+                    raise FinanceClientAPIError(f"Unsuccessful API access [URL: {url}, status: {status}]") from e
+                self._logger.warning(f"Retrying API access [URL: {url}, status: {status}]")
+                await asyncio.sleep(self._retry_delay(attempt, response))
+            else:
+                self._logger.info(f"Successful API access "
+                                  f"[URL: {response.url}, status: {response.status_code}]")
+                return response
+
+    def _retry_delay(self, attempt: int, response: typing.Any) -> float:
+        """ Return the seconds to wait before retrying a failed API query.
+        Parameters:
+        ----------
+        attempt: int
+            Contains the number of the failed attempt (starting at 0)
+        response: httpx.Response, optional
+            Contains the response of the failed attempt (None if there is no response)
+
+        Returns:
+        -------
+        float
+            Exponential backoff, or the 'Retry-After' header if it is longer
+        """
+
+        delay = self._FinanceRetryBackoff * 2 ** attempt
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if isinstance(retry_after, str) and retry_after.isdigit():
+            delay = max(delay, float(retry_after))
+        return delay
+
+    def _cache_response(self, url: str, response: typing.Any) -> None:
+        """ Store the response into the on-disk cache.
+
+        Must only be called once the response data has been validated.
+        Responses served from the cache are not stored again (their
+        timestamp is kept). A failure writing the cache is logged but does
+        not abort the query.
+
+        Parameters:
+        ----------
+        url: str
+            Contains the query URL
+        response: Response
+            Contains the response of the request
+        """
+
+        if self._cache is None or getattr(response, 'from_cache', False) is True:
+            return
+
+        try:
+            self._cache.put(url, response.content)
+        except FinanceClientIOError as e:
+            self._logger.warning(f"{e}")
+
     @classmethod
     def _build_query_metadata_key(self) -> str:
         """ Return metadata query key.
@@ -215,10 +731,12 @@ class FinanceClient(ABC):
 
         pass
 
-    def _process_query_response(self, response: requests.Response) -> None:
+    def _process_query_response(self, ticker: str, response: requests.Response) -> None:
         """ Preprocess query data.
         Parameters:
         ----------
+        ticker: str
+            Contain the ticker
         response: Response
             Contain the response of the request
         Raises:
@@ -228,18 +746,38 @@ class FinanceClient(ABC):
         """
 
         try:
-            json_data_downloaded = response.json()
+            json_data_downloaded = orjson.loads(response.content) if orjson is not None else response.json()
+        except Exception as e:
+            raise FinanceClientInvalidData("Invalid data") from e
+
+        self._process_query_data(ticker, json_data_downloaded)
+
+    def _process_query_data(self, ticker: str, json_data_downloaded: dict) -> None:
+        """ Preprocess query json data.
+        Parameters:
+        ----------
+        ticker: str
+            Contain the ticker
+        json_data_downloaded: dict
+            Contain the decoded json of a ticker query
+        Raises:
+        ------
+        FinanceClientInvalidData
+            The data is invalid
+        """
+
+        try:
             json_metadata = json_data_downloaded[self._build_query_metadata_key()]
             json_data = json_data_downloaded[self._build_query_data_key()]
-            self._json_metadata.append(json_metadata)
-            self._json_data.append(json_data)
+            self._json_metadata[ticker] = json_metadata
+            self._json_data[ticker] = json_data
         except Exception as e:
             raise FinanceClientInvalidData("Invalid data") from e
         else:
             self._logger.info("Metadata and data fields found")
 
         self._logger.info(f"Metadata: '{json_metadata}'")
-        self._logger.info(f"Data: '{json.dumps(json_data)[0:218]}...'")
+        self._logger.info(f"Data: '{str(dict(itertools.islice(json_data.items(), 2)))[0:218]}...'")
 
     @abstractmethod
     def _validate_query_data(self, ticker: str) -> None:
@@ -252,6 +790,37 @@ class FinanceClient(ABC):
 
         pass
 
+    @abstractmethod
+    def _build_data_frame(self, ticker: str) -> pd.DataFrame:
+        """ Build the data frame of the ticker from its json data.
+        Parameters:
+        ----------
+        ticker: str
+            Contain the ticker
+        """
+
+        pass
+
+    def _prepare_data_frame(self, ticker: str, data_frame: pd.DataFrame) -> pd.DataFrame:
+        """ Prepare the data frame of the ticker before storing it.
+
+        Called once per ticker with the built or cached data frame.
+
+        Parameters:
+        ----------
+        ticker: str
+            Contain the ticker
+        data_frame: pd.DataFrame
+            Contains the data frame of the ticker
+
+        Returns:
+        -------
+        pd.DataFrame
+            Data frame to store
+        """
+
+        return data_frame
+
     def to_pandas(self) -> pd.DataFrame:
         """ Return pandas data frame from json data.
         Returns:
@@ -260,30 +829,28 @@ class FinanceClient(ABC):
             Return the list of data frames of the tickers
         """
 
-        assert self._data_frame is not None
-
-        return self._data_frame
+        return self._get_dataframes()
 
-    def to_csv(self, path2file: Path) -> Path:
+    def to_csv(self, path2file: Union[Path, typing.IO]) -> Union[Path, typing.IO]:
         """ Write json data into csv file 'path2file'.
         Parameters:
         -----------
-        psth2file: Path
-            Constains the path to the file
+        psth2file: Union[Path, typing.IO]
+            Constains the path to the file or a file-like object (e.g. io.BytesIO)
         Returns:
         -------
-        Path
-            Return the path to the file
+        Union[Path, typing.IO]
+            Return the path to the file or the file-like object
         Raises:
         ------
         FinanceClientIOError
             Unable to write json data into file
         """
 
-        assert self._data_frame is not None
+        data_frame = self._get_dataframe(self._ticker[0])
 
         try:
-            self._data_frame[0].to_csv(path2file)
+            data_frame.to_csv(path2file)
         except (IOError, PermissionError) as e:
             raise FinanceClientIOError(f"Unable to write json data into file '{path2file}'") from e
 
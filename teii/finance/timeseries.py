@@ -3,11 +3,13 @@
 
 import datetime as dt
 import logging
+import numpy as np
 import pandas as pd
 import typing
 
 from typing import Optional, Union
 
+from teii.finance import FileCache
 from teii.finance import FinanceClientInvalidData
 from teii.finance import FinanceClientParamError
 from teii.finance import FinanceClient
@@ -23,11 +25,33 @@ class TimeSeriesFinanceClient(FinanceClient):
         ----------
         _data_field2name_type: dict[str, dict[str, str]]
             Dictionary to define the name and type columns.
+        _rename_map: dict[str, str]
+            JSON data field to column name (derived from _data_field2name_type).
+        _dtype_map: dict[str, str]
+            Column name to column type (derived from _data_field2name_type).
+        _compact_float_dtype_map: dict[str, str]
+            Column name to float32 for the float columns (used with compact_dtypes).
+        _USED_FIELDS: tuple[str, ...]
+            Columns used by the queries (kept with used_fields_only).
+        _dates: typing.Dict[str, pd.DatetimeIndex]
+            Sorted dates of each ticker.
+        _close_arrays: typing.Dict[str, np.ndarray]
+            Daily close price of each ticker.
+        _volume_arrays: typing.Dict[str, np.ndarray]
+            Daily volume of each ticker.
+        _yearly_dividends: typing.Dict[str, pd.Series]
+            Yearly dividends of each ticker indexed by year.
 
         Mothods:
         --------
-        _build_data_frame()
+        _build_data_frame(ticker)
             Build Panda's DataFrame and format data.
+        _prepare_data_frame(ticker, data_frame)
+            Drop unused columns, compact the data frame and precompute the per-ticker query data.
+        _compact_data_frame(data_frame)
+            Return the data frame with narrower column types.
+        _daily_series(arrays, name, from_date = None, to_date = None)
+            Return the daily series of 'arrays' from 'from_date' to 'to_date'.
         _build_base_query_url_params(self, ticker)
             Return base query URL parameters.
         _build_query_data_key()
@@ -59,9 +83,21 @@ class TimeSeriesFinanceClient(FinanceClient):
             "8. split coefficient":     ("splitc",   "int"),
         }
 
+    _rename_map = {key: name_type[0] for key, name_type in _data_field2name_type.items()}
+
+    _dtype_map = {name_type[0]: name_type[1] for name_type in _data_field2name_type.values()}
+
+    _compact_float_dtype_map = {name: "float32" for name, dtype in _dtype_map.items() if dtype == "float"}
+
+    _USED_FIELDS = ('close', 'volume', 'dividend', 'high', 'low')
+
     def __init__(self, ticker: list,
                  api_key: Optional[str] = None,
-                 logging_level: Union[int, str] = logging.INFO) -> None:
+                 logging_level: Union[int, str] = logging.INFO,
+                 cache: bool = False,
+                 cache_ttl: float = FileCache.DefaultTTL,
+                 compact_dtypes: bool = False,
+                 used_fields_only: bool = False) -> None:
         """ TimeSeriesFinanceClient constructor.
         Parameters:
         ----------
@@ -71,53 +107,145 @@ class TimeSeriesFinanceClient(FinanceClient):
             key to search the URLs (default is None)
         logging_level: Union[int, str]
             defines the level of the logger (default is logging.INFO)
+        cache: bool
+            store the API responses on disk and reuse them (default is False)
+        cache_ttl: float
+            time to live of the cached responses in seconds (default is one day)
+        compact_dtypes: bool
+            store prices as float32 and integer fields with the smallest integer
+            type that holds them, halving memory at the cost of precision (default is False)
+        used_fields_only: bool
+            keep only the columns used by the queries (_USED_FIELDS), dropping
+            'open', 'aclose' and 'splitc' from the data frames (default is False)
         """
 
-        super().__init__(ticker, api_key, logging_level)
+        super().__init__(ticker, api_key, logging_level, cache=cache, cache_ttl=cache_ttl)
+        self._compact_dtypes = compact_dtypes
+        self._used_fields_only = used_fields_only
+        self._dates: typing.Dict[str, pd.DatetimeIndex] = {}
+        self._close_arrays: typing.Dict[str, np.ndarray] = {}
+        self._volume_arrays: typing.Dict[str, np.ndarray] = {}
+        self._yearly_dividends: typing.Dict[str, pd.Series] = {}
         self._logger.info("Construyendo TimeSeriesFinanceClient")
-        self._build_data_frame()
 
-    def _build_data_frame(self) -> None:
+    def _build_data_frame(self, ticker: str) -> pd.DataFrame:
         """ Build Panda's DataFrame and format data.
+        Parameters:
+        ----------
+        ticker: str
+            Contains the ticker
+
+        Return:
+        ------
+        pd.DataFrame
+            Data frame of the ticker sorted by date
+
         Raises:
         ------
         FinanceClientInvalidData
-            Data json not specified,not found in axis or not understood
+            Data json empty, not specified, not found in axis or not understood
         """
 
         #   Tarea 3
         #   Comprueba que no se produce ningún error y genera excepción
         #   'FinanceClientInvalidData' en caso de error (hay un ejemplo en línea 86)
-        for i, tick in enumerate(self._ticker):
-            # Build Panda's data frame
-            try:
-                data_frame = pd.DataFrame.from_dict(self._json_data[i], orient='index', dtype=float)
-            except TypeError as t:
-                self._logger.error(f"{t}", exc_info=False)
-                raise FinanceClientInvalidData("Data json not specified") from t
-
-            # Rename data fields
-            try:
-                data_frame = data_frame.rename(columns={key: name_type[0]
-                                                        for key, name_type in self._data_field2name_type.items()})
-            except KeyError as k:
-                self._logger.error(f"{k}", exc_info=False)
-                raise FinanceClientInvalidData("Not found in axis") from k
-
-            # Set data field types
-            try:
-                data_frame = data_frame.astype(dtype={name_type[0]: name_type[1]
-                                               for key, name_type in self._data_field2name_type.items()})
-            except TypeError as t:
-                self._logger.error(f"{t}", exc_info=False)
-                raise FinanceClientInvalidData("Data type not understood") from t
-
-            # Set index type
-            data_frame.index = data_frame.index.astype("datetime64[ns]")
-
-            # Sort data
-            self._data_frame.append(data_frame.sort_index(ascending=True))
-            self._logger.info(f"Creado data frame del ticker '{tick}'")
+
+        # Build Panda's data frame (a single float array with the fields already in column order)
+        json_data = self._json_data[ticker]
+        if not json_data:
+            self._logger.error(f"Empty time series of ticker '{ticker}'", exc_info=False)
+            raise FinanceClientInvalidData("Empty time series")
+        try:
+            values = np.array([[fields[key] for key in self._rename_map] for fields in json_data.values()],
+                              dtype=float)
+            data_frame = pd.DataFrame(values, index=list(json_data), columns=list(self._rename_map.values()))
+        except KeyError as k:
+            self._logger.error(f"{k}", exc_info=False)
+            raise FinanceClientInvalidData("Not found in axis") from k
+        except (AttributeError, TypeError, ValueError) as t:
+            self._logger.error(f"{t}", exc_info=False)
+            raise FinanceClientInvalidData("Data json not specified") from t
+
+        # Set data field types
+        try:
+            data_frame = data_frame.astype(dtype=self._dtype_map)
+        except TypeError as t:
+            self._logger.error(f"{t}", exc_info=False)
+            raise FinanceClientInvalidData("Data type not understood") from t
+
+        # Set index type (AlphaVantage dates are always 'YYYY-MM-DD')
+        try:
+            data_frame.index = pd.to_datetime(data_frame.index, format='%Y-%m-%d', cache=True)
+        except ValueError as v:
+            self._logger.error(f"{v}", exc_info=False)
+            raise FinanceClientInvalidData("Date format not understood") from v
+
+        # Sort data (AlphaVantage returns the dates in descending order, reversing is enough)
+        if data_frame.index.is_monotonic_decreasing:
+            data_frame = data_frame.iloc[::-1]
+        elif not data_frame.index.is_monotonic_increasing:
+            data_frame = data_frame.sort_index(ascending=True)
+
+        return data_frame
+
+    def _prepare_data_frame(self, ticker: str, data_frame: pd.DataFrame) -> pd.DataFrame:
+        """ Drop unused columns, compact the data frame and precompute the per-ticker query data.
+        Parameters:
+        ----------
+        ticker: str
+            Contains the ticker
+        data_frame: pd.DataFrame
+            Contains the data frame of the ticker
+
+        Return:
+        ------
+        pd.DataFrame
+            Data frame to store
+        """
+
+        if self._used_fields_only:
+            data_frame = data_frame[list(self._USED_FIELDS)]
+
+        if self._compact_dtypes:
+            data_frame = self._compact_data_frame(data_frame)
+
+        # Contiguous arrays for the daily queries (sorted dates allow binary search)
+        self._dates[ticker] = data_frame.index
+        self._close_arrays[ticker] = np.ascontiguousarray(data_frame['close'].values)
+        self._volume_arrays[ticker] = np.ascontiguousarray(data_frame['volume'].values)
+
+        # Yearly dividends indexed by year ('YYYY')
+        series = data_frame['dividend'].resample('YS').sum()
+        series.index = series.index.year.astype(str)
+        self._yearly_dividends[ticker] = series
+
+        return data_frame
+
+    def _compact_data_frame(self, data_frame: pd.DataFrame) -> pd.DataFrame:
+        """ Return the data frame with narrower column types.
+
+        Float fields are cast to float32 (about 7 significant digits) and
+        integer fields are downcast without loss to the smallest integer type
+        that holds their values.
+
+        Parameters:
+        ----------
+        data_frame: pd.DataFrame
+            Contains the data frame of a ticker
+
+        Return:
+        ------
+        pd.DataFrame
+            Data frame with the narrower column types
+        """
+
+        data_frame = data_frame.astype(dtype={name: dtype for name, dtype in self._compact_float_dtype_map.items()
+                                              if name in data_frame.columns})
+        for name, dtype in self._dtype_map.items():
+            if dtype == "int" and name in data_frame.columns:
+                data_frame[name] = pd.to_numeric(data_frame[name], downcast='integer')
+
+        return data_frame
 
     def _build_base_query_url_params(self, ticker: str) -> str:
         """ Return base query URL parameters.
@@ -137,10 +265,9 @@ class TimeSeriesFinanceClient(FinanceClient):
         str
             Contains te base query url parameters
         """
-        self._logger.info("Obteniendo parametros de URL de peticion")
-
         return f"function=TIME_SERIES_DAILY_ADJUSTED&symbol={ticker}&outputsize=full&apikey={self._api_key}"
 
+    @classmethod
     def _build_query_data_key(cls) -> str:
         """ Return data query key.
         Return:
@@ -165,12 +292,54 @@ class TimeSeriesFinanceClient(FinanceClient):
         """
         self._logger.info("Validando datos de peticion")
         try:
-            assert self._json_metadata[-1]["2. Symbol"] == ticker
+            assert self._json_metadata[ticker]["2. Symbol"] == ticker
         except Exception as e:
             self._logger.error(f"{e}", exc_info=False)
             raise FinanceClientInvalidData("Metadata field '2. Symbol' not found") from e
         else:
-            self._logger.info(f"Metadata key '2. Symbol' = '{self._ticker[-1]}' found")
+            self._logger.info(f"Metadata key '2. Symbol' = '{ticker}' found")
+
+    def _daily_series(self,
+                      arrays: typing.Dict[str, np.ndarray],
+                      name: str,
+                      from_date: Optional[dt.date] = None,
+                      to_date: Optional[dt.date] = None) -> typing.List[pd.Series]:
+        """ Return the daily series of 'arrays' from 'from_date' to 'to_date'.
+
+        The date range is located with a binary search on the sorted dates
+        instead of label based slicing. The series keep the name of the
+        field ('close', 'volume').
+
+        Parameters:
+        ----------
+        arrays: typing.Dict[str, np.ndarray]
+            Daily values of each ticker
+        name: str
+            Name of the series
+        from_date: datetime.date
+            The initial date
+        to_date: datetime.date
+            The final date
+
+        Return:
+        ------
+        typing.List[pd.Series]
+            List of panda's series.
+        """
+
+        self._get_dataframes()
+
+        ser: typing.List[pd.Series] = []
+        for t in self._ticker:
+            dates, values = self._dates[t], arrays[t]
+            lo, hi = 0, len(dates)
+            if from_date is not None and to_date is not None:
+                lo = dates.values.searchsorted(np.datetime64(from_date), side='left')
+                hi = dates.values.searchsorted(np.datetime64(to_date), side='right')
+
+            ser.append(pd.Series(values[lo:hi], index=dates[lo:hi], name=name))
+
+        return ser
 
     def daily_price(self,
                     from_date: Optional[dt.date] = None,
@@ -194,27 +363,14 @@ class TimeSeriesFinanceClient(FinanceClient):
             Dates are incorrect
         """
         self._logger.info(f"Obteniendo precio diario de los tickers {self._ticker}")
-        assert self._data_frame is not None
-
-        ser: typing.List[pd.Series] = []
-        for df in self._data_frame:
-            series = df['close']
-
-            #   Comprueba que from_date <= to_date y genera excepción
-            #   'FinanceClientParamError' en caso de error (hay que crear dicha excepción)
-            if from_date is not None and to_date is not None:
-                try:
-                    assert from_date <= to_date  # type: ignore
-                except Exception as e:
-                    self._logger.error(f"{e}", exc_info=False)
-                    raise FinanceClientParamError("Dates are incorrect") from e
-
-            if from_date is not None and to_date is not None:
-                series = series.loc[from_date:to_date]   # type: ignore
 
-            ser.append(series)
+        #   Comprueba que from_date <= to_date y genera excepción
+        #   'FinanceClientParamError' en caso de error (hay que crear dicha excepción)
+        if from_date is not None and to_date is not None and from_date > to_date:  # type: ignore
+            self._logger.error(f"'{from_date}' > '{to_date}'", exc_info=False)
+            raise FinanceClientParamError("Dates are incorrect")
 
-        return ser
+        return self._daily_series(self._close_arrays, 'close', from_date, to_date)
 
     def daily_volume(self,
                      from_date: Optional[dt.date] = None,
@@ -238,28 +394,14 @@ class TimeSeriesFinanceClient(FinanceClient):
             Dates are incorrect
         """
         self._logger.info(f"Obteniendo volumen diario de los tickers {self._ticker}")
-        assert self._data_frame is not None
-
-        ser: typing.List[pd.Series] = []
-        for df in self._data_frame:
-            series = df['volume']
-
-            #   Comprueba que from_date <= to_date y genera excepción
-            #   'FinanceClientParamError' en caso de error
-
-            if from_date is not None and to_date is not None:
-                try:
-                    assert from_date <= to_date  # type: ignore
-                except Exception as e:
-                    self._logger.error(f"{e}", exc_info=False)
-                    raise FinanceClientParamError("Dates are incorrect") from e
-
-            if from_date is not None and to_date is not None:
-                series = series.loc[from_date:to_date]  # type: ignore
 
-            ser.append(series)
+        #   Comprueba que from_date <= to_date y genera excepción
+        #   'FinanceClientParamError' en caso de error
+        if from_date is not None and to_date is not None and from_date > to_date:  # type: ignore
+            self._logger.error(f"'{from_date}' > '{to_date}'", exc_info=False)
+            raise FinanceClientParamError("Dates are incorrect")
 
-        return ser
+        return self._daily_series(self._volume_arrays, 'volume', from_date, to_date)
 
     def yearly_dividends(self,
                          from_year: Optional[int] = None,
@@ -283,23 +425,18 @@ class TimeSeriesFinanceClient(FinanceClient):
             Dates are incorrect
         """
         self._logger.info(f"Obteniendo dividendos anuales de los tickers {self._ticker}")
-        assert self._data_frame is not None
-
-        ser: typing.List[pd.Series] = []
-        for df in self._data_frame:
-            series = df['dividend'].groupby(pd.Grouper(level=0, freq='1YS')).sum()
-            series.index = series.index.strftime('%Y')
 
-            #   Comprueba que from_year <= to_year y genera excepción
-            #   'FinanceClientParamError' en caso de error
+        #   Comprueba que from_year <= to_year y genera excepción
+        #   'FinanceClientParamError' en caso de error
+        if from_year is not None and to_year is not None and from_year > to_year:  # type: ignore
+            self._logger.error(f"'{from_year}' > '{to_year}'", exc_info=False)
+            raise FinanceClientParamError("Dates are incorrect")
 
-            if from_year is not None and to_year is not None:
-                try:
-                    assert from_year <= to_year  # type: ignore
-                except Exception as e:
-                    self._logger.error(f"{e}", exc_info=False)
-                    raise FinanceClientParamError("Dates are incorrect") from e
+        self._get_dataframes()
 
+        ser: typing.List[pd.Series] = []
+        for t in self._ticker:
+            series = self._yearly_dividends[t]
             if from_year is not None and to_year is not None:
                 series = series.loc[str(from_year):str(to_year)]  # type: ignore
 
@@ -329,22 +466,17 @@ class TimeSeriesFinanceClient(FinanceClient):
             Dates are incorrect
         """
         self._logger.info(f"Obteniendo dividendos trimestrales de los tickers {self._ticker}")
-        assert self._data_frame is not None
+
+        #   Comprueba que from_year <= to_year y genera excepción
+        #   'FinanceClientParamError' en caso de error
+        if from_year is not None and to_year is not None and from_year > to_year:  # type: ignore
+            self._logger.error(f"'{from_year}' > '{to_year}'", exc_info=False)
+            raise FinanceClientParamError("Dates are incorrect")
 
         ser: typing.List[pd.Series] = []
-        for df in self._data_frame:
+        for df in self._get_dataframes():
             series = df['dividend'].resample('QS').sum()
 
-            #   Comprueba que from_year <= to_year y genera excepción
-            #   'FinanceClientParamError' en caso de error
-
-            if from_year is not None and to_year is not None:
-                try:
-                    assert from_year <= to_year  # type: ignore
-                except Exception as e:
-                    self._logger.error(f"{e}", exc_info=False)
-                    raise FinanceClientParamError("Dates are incorrect") from e
-
             if from_year is not None and to_year is not None:
                 series = series.loc[str(from_year):str(to_year)]  # type: ignore
 
@@ -359,21 +491,14 @@ class TimeSeriesFinanceClient(FinanceClient):
         typing.List[typing.Tuple]
             List of tuple that contains the highest daily variation
         """
-        assert self._data_frame is not None
         self._logger.info(f"Obteniendo la maxima variacion diaria de los tickers {self._ticker}")
         tupla: typing.List[typing.Tuple] = []
-        for df in self._data_frame:
-            series = df[['high', 'low']].copy()
-
-            series['high-low'] = series['high'] - series['low']
-
-            series_highest = series.sort_values('high-low', ascending=False).head(1)
+        for df in self._get_dataframes():
+            high_low = df['high'].sub(df['low'])
 
-            i = series_highest.index.values[0]
+            i = high_low.values.argmax()
 
-            v = series_highest.values
-
-            tup = (pd.to_datetime(str(i)), v[0][0], v[0][1], v[0][2])
+            tup = (df.index[i], df['high'].iat[i], df['low'].iat[i], high_low.iat[i])
 
             tupla.append(tup)
 
@@ -386,21 +511,14 @@ class TimeSeriesFinanceClient(FinanceClient):
         typing.List[typing.Tuple]
             List of tuple that contains the highest monthly mean variation
         """
-        assert self._data_frame is not None
         self._logger.info(f"Obteniendo la maxima variación media mensual de los tickers {self._ticker}")
         tupla: typing.List[typing.Tuple] = []
-        for df in self._data_frame:
-            series = df[['high', 'low']].copy()
-            series['mean-variation'] = series['high']-series['low']
-
-            series_highest = series.groupby(pd.Grouper(level=0, freq='MS')).mean()
-
-            series_highest = series_highest.sort_values('mean-variation', ascending=False).head(1)
+        for df in self._get_dataframes():
+            mean_variation = (df['high'] - df['low']).resample('MS').mean()
 
-            i = series_highest.index.values[0]
-            v = series_highest.values
+            i = np.nanargmax(mean_variation.values)   # months without sessions are NaN
 
-            tup = (pd.to_datetime(i), v[0][2])
+            tup = (mean_variation.index[i], mean_variation.iat[i])
 
             tupla.append(tup)
 
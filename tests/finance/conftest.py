@@ -1,13 +1,42 @@
 """ Unit tests for teii.finance subpackage """
 
 
+import functools
 import json
 import pandas as pd
 import unittest.mock as mock
 import teii.finance.finance
 
 from importlib import resources
-from pytest import fixture
+from pytest import fixture, MonkeyPatch
+from types import SimpleNamespace
+
+from teii.finance import TimeSeriesFinanceClient
+
+try:
+    import orjson
+except ImportError:  # orjson es opcional, sin él se usa json
+    orjson = None  # type: ignore
+
+
+@functools.lru_cache(maxsize=1)
+def _ibm_payload():
+    """ Return the raw and decoded IBM JSON response (read and parsed once per process). """
+
+    with resources.path('teii.finance.data', 'TIME_SERIES_DAILY_ADJUSTED.IBM.json') as path2json:
+        content = path2json.read_bytes()
+    return content, orjson.loads(content) if orjson is not None else json.loads(content)
+
+
+@functools.lru_cache(maxsize=None)
+def _ibm_truncated_payload(symbol, rows):
+    """ Return the IBM JSON response truncated to the last 'rows' days, under ticker 'symbol'. """
+
+    _, json_data = _ibm_payload()
+    series = json_data['Time Series (Daily)']
+    json_data = {'Meta Data': {**json_data['Meta Data'], '2. Symbol': symbol},
+                 'Time Series (Daily)': {date: series[date] for date in list(series)[:rows]}}
+    return json.dumps(json_data).encode('utf-8'), json_data
 
 
 @fixture(scope='session')
@@ -15,47 +44,112 @@ def api_key_str():
     return ("nokey")
 
 
-@fixture(scope='package')
-def mocked_response():
+@fixture(scope='module')
+def monkeypatch_module():
+    mp = MonkeyPatch()
+    yield mp
+    mp.undo()
+
+
+@fixture(scope='module')
+def mocked_response(monkeypatch_module):
     def mocked_get(url):
         response = mock.Mock()
         response.status_code = 200
-        if 'IBM' in url or 'NOTICKER' in url:
-            json_filename = 'TIME_SERIES_DAILY_ADJUSTED.IBM.json'
+        if 'IBMFAST' in url:
+            content, json_data = _ibm_truncated_payload('IBMFAST', 50)
+        elif 'IBMEMPTY' in url:
+            content, json_data = _ibm_truncated_payload('IBMEMPTY', 0)
+        elif 'IBM' in url or 'NOTICKER' in url:
+            content, json_data = _ibm_payload()
+        elif 'THROTTLED' in url:
+            # AlphaVantage devuelve los errores y el límite de peticiones con status 200
+            json_data = {'Note': 'Thank you for using Alpha Vantage! Our standard API call frequency is '
+                                 '5 calls per minute and 500 calls per day.'}
+            content = json.dumps(json_data).encode('utf-8')
         else:
             raise ValueError('Ticker no soportado')
-        with resources.open_text('teii.finance.data', json_filename) as json_fid:
-            json_data = json.load(json_fid)
+        response.content = content
         response.json.return_value = json_data
         return response
 
     requests = mock.Mock()
     requests.get.side_effect = mocked_get
+    requests.Session.return_value.get.side_effect = mocked_get
+
+    monkeypatch_module.setattr(teii.finance.finance, 'requests', requests)
+
+    # Cliente asíncrono escrito a mano (mock.AsyncMock y los métodos mágicos asíncronos requieren Python 3.8)
+    async_get = mock.Mock(side_effect=mocked_get)
+
+    class AsyncClient:
+        def __init__(self, **kwargs):
+            pass
+
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc_info):
+            return False
+
+        async def get(self, url):
+            return async_get(url)
 
-    teii.finance.finance.requests = requests
+    monkeypatch_module.setattr(teii.finance.finance, 'httpx', SimpleNamespace(AsyncClient=AsyncClient))
+
+    return SimpleNamespace(session_get=requests.Session.return_value.get, async_get=async_get)
+
+
+@fixture(params=['asyncio', 'threads'])
+def fetch_path(request, mocked_response, monkeypatch):
+    """ Run the test through the httpx/asyncio path and the requests.Session/thread pool path (no httpx). """
+
+    if request.param == 'threads':
+        monkeypatch.setattr(teii.finance.finance, 'httpx', None)
+    return request.param
+
+
+@fixture(scope='module')
+def ibm_client(api_key_str, mocked_response):
+    return TimeSeriesFinanceClient(["IBM"], api_key_str)
+
+
+@fixture(scope='module')
+def ibm_client_fast(api_key_str, mocked_response):
+    return TimeSeriesFinanceClient(["IBMFAST"], api_key_str)
+
+
+def _read_parquet_series(name, column):
+    """ Read column 'column' of the reference parquet file 'TIME_SERIES_DAILY_ADJUSTED.IBM.{name}.parquet'.
+
+    Returns the series together with its precomputed count and values.
+    """
+
+    with resources.path('teii.finance.data', f'TIME_SERIES_DAILY_ADJUSTED.IBM.{name}.parquet') as path2parquet:
+        ds = pd.read_parquet(path2parquet, columns=[column], use_threads=True)[column]
+    return SimpleNamespace(series=ds, count=ds.count(), np=ds.to_numpy(copy=False))
 
 
 @fixture(scope='package')
 def pandas_series_IBM_prices():
-    with resources.path('teii.finance.data', 'TIME_SERIES_DAILY_ADJUSTED.IBM.prices.unfiltered.csv') as path2csv:
-        df = pd.read_csv(path2csv, index_col=0, parse_dates=True)
-        ds = df['close']
-    return ds
+    return _read_parquet_series('prices.unfiltered', 'close')
 
 
 @fixture(scope='package')
 def pandas_series_IBM_prices_filtered():
-    with resources.path('teii.finance.data', 'TIME_SERIES_DAILY_ADJUSTED.IBM.prices.filtered.csv') as path2csv:
-        df = pd.read_csv(path2csv, index_col=0, parse_dates=True)
-        ds = df['close']
-    return ds
+    return _read_parquet_series('prices.filtered', 'close')
 
 
 @fixture(scope='package')
 def pandas_series_IBM():
-    with resources.path('teii.finance.data', 'TIME_SERIES_DAILY_ADJUSTED.IBM.unfiltered.csv') as path2csv:
-        df = pd.read_csv(path2csv, index_col=0, parse_dates=True)
-    return df
+    with resources.path('teii.finance.data', 'TIME_SERIES_DAILY_ADJUSTED.IBM.unfiltered.parquet') as path2parquet:
+        return pd.read_parquet(path2parquet, use_threads=True)
+
+
+@fixture(scope='package')
+def path_json():
+    with resources.path('teii.finance.data', 'TIME_SERIES_DAILY_ADJUSTED.IBM.json') as path2json:
+        return path2json
 
 
 @fixture(scope='package')
@@ -66,48 +160,29 @@ def path_csv():
 
 @fixture(scope='package')
 def pandas_series_IBM_volume():
-    with resources.path('teii.finance.data', 'TIME_SERIES_DAILY_ADJUSTED.IBM.volume.unfiltered.csv') as path2csv:
-        df = pd.read_csv(path2csv, index_col=0, parse_dates=True)
-        ds = df['volume']
-    return ds
+    return _read_parquet_series('volume.unfiltered', 'volume')
 
 
 @fixture(scope='package')
 def pandas_series_IBM_volume_filtered():
-    with resources.path('teii.finance.data', 'TIME_SERIES_DAILY_ADJUSTED.IBM.volume.filtered.csv') as path2csv:
-        df = pd.read_csv(path2csv, index_col=0, parse_dates=True)
-        ds = df['volume']
-    return ds
+    return _read_parquet_series('volume.filtered', 'volume')
 
 
 @fixture(scope='package')
 def pandas_series_IBM_dividend():
-    with resources.path('teii.finance.data', 'TIME_SERIES_DAILY_ADJUSTED.IBM.yearly_dividends.unfiltered.csv') as path2csv:
-        df = pd.read_csv(path2csv, index_col=0, parse_dates=True)
-        ds = df['dividend']
-    return ds
+    return _read_parquet_series('yearly_dividends.unfiltered', 'dividend')
 
 
 @fixture(scope='package')
 def pandas_series_IBM_dividend_filtered():
-    with resources.path('teii.finance.data', 'TIME_SERIES_DAILY_ADJUSTED.IBM.yearly_dividends.filtered.csv') as path2csv:
-        df = pd.read_csv(path2csv, index_col=0, parse_dates=True)
-        ds = df['dividend']
-    return ds
+    return _read_parquet_series('yearly_dividends.filtered', 'dividend')
 
 
 @fixture(scope='package')
 def pandas_series_IBM_dividend_quarter():
-    with resources.path('teii.finance.data',
-                        'TIME_SERIES_DAILY_ADJUSTED.IBM.yearly_dividends_quarter.unfiltered.csv') as path2csv:
-        df = pd.read_csv(path2csv, index_col=0, parse_dates=True)
-        ds = df['dividend']
-    return ds
+    return _read_parquet_series('yearly_dividends_quarter.unfiltered', 'dividend')
 
 
 @fixture(scope='package')
 def pandas_series_IBM_dividend_quarter_filtered():
-    with resources.path('teii.finance.data', 'TIME_SERIES_DAILY_ADJUSTED.IBM.yearly_dividends_quarter.filtered.csv') as path2csv:
-        df = pd.read_csv(path2csv, index_col=0, parse_dates=True)
-        ds = df['dividend']
-    return ds
+    return _read_parquet_series('yearly_dividends_quarter.filtered', 'dividend')
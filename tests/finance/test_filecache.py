@@ -0,0 +1,50 @@
+""" Unit tests for teii.finance.cache module """
+
+
+import pytest
+
+from teii.finance import FileCache
+
+
+URL = "https://www.alphavantage.co/query?function=TIME_SERIES_DAILY_ADJUSTED&symbol=IBM"
+
+
+def test_get_missing(tmp_path):
+    cache = FileCache(tmp_path)
+
+    assert cache.get(URL) is None
+
+
+def test_put_get_success(tmp_path):
+    cache = FileCache(tmp_path)
+
+    cache.put(URL, b'{"Meta Data": {"2. Symbol": "IBM"}}')
+
+    response = cache.get(URL)
+
+    assert response is not None
+    assert response.status_code == 200
+    assert response.json() == {"Meta Data": {"2. Symbol": "IBM"}}
+
+
+def test_get_expired(tmp_path):
+    cache = FileCache(tmp_path, ttl=0)
+
+    cache.put(URL, b'{}')
+
+    assert cache.get(URL) is None
+
+
+def test_put_get_frame_success(tmp_path, pandas_series_IBM):
+    pytest.importorskip("pyarrow")
+    cache = FileCache(tmp_path)
+
+    cache.put_frame("IBM", pandas_series_IBM)
+
+    assert cache.get_frame("IBM").equals(pandas_series_IBM)
+
+
+def test_get_frame_missing(tmp_path):
+    cache = FileCache(tmp_path)
+
+    assert cache.get_frame("IBM") is None
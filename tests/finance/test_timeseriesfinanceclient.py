@@ -2,241 +2,374 @@
 
 
 import datetime
+import functools
+import io
+import math
 import pytest
-import filecmp
 import numpy as np
 import pandas as pd
+import requests
+import teii.finance.finance
+import unittest.mock as mock
 
+from types import SimpleNamespace
+
+from teii.finance import FileCache
 from teii.finance import TimeSeriesFinanceClient
+from teii.finance import FinanceClientAPIError
 from teii.finance import FinanceClientInvalidAPIKey
 from teii.finance import FinanceClientInvalidData
 from teii.finance import FinanceClientParamError
 
 
+_EXPECTED_DAILY_VAR = (pd.Timestamp("2020-03-16"), 107.41, 95.0, 12.41)
+
+_EXPECTED_MONTHLY_VAR = (pd.Timestamp("2020-03-01"), 6.833636363636362)
+
+
+def _assert_series_equal(ps, ref):
+    assert ps.dtype == ref.series.dtype
+
+    assert ps.index.equals(ref.series.index)
+
+    assert np.array_equal(ps.to_numpy(copy=False), ref.np)
+
+
 def test_constructor_success(api_key_str,
                              mocked_response):
-    TimeSeriesFinanceClient(["IBM", "IBM", "IBM", "IBM"], api_key_str)
+    TimeSeriesFinanceClient(["IBM"], api_key_str)
 
 
-def test_constructor_failure_invalid_data(api_key_str):
+def test_to_pandas_failure_invalid_data(api_key_str,
+                                        mocked_response):
+    fc = TimeSeriesFinanceClient(["NOTICKER"], api_key_str)
+
     with pytest.raises(FinanceClientInvalidData):
-        TimeSeriesFinanceClient(["NOTICKER"], api_key_str)
+        fc.to_pandas()
 
+    # Los datos inválidos no se conservan: la segunda consulta vuelve a fallar
+    with pytest.raises(FinanceClientInvalidData):
+        fc.to_pandas()
 
-def test_constructor_failure_invalid_api_key():
-    with pytest.raises(FinanceClientInvalidAPIKey):
-        TimeSeriesFinanceClient(["IBM", "IBM", "IBM", "IBM"])
 
+def test_to_pandas_failure_empty_data(api_key_str,
+                                      mocked_response):
+    fc = TimeSeriesFinanceClient(["IBMEMPTY"], api_key_str)
 
-def test_daily_price_no_dates(api_key_str,
-                              mocked_response,
-                              pandas_series_IBM_prices):
-    fc = TimeSeriesFinanceClient(["IBM", "IBM", "IBM", "IBM"], api_key_str)
+    with pytest.raises(FinanceClientInvalidData, match="Empty time series"):
+        fc.to_pandas()
 
-    l_ps = fc.daily_price()
 
-    for ps in l_ps:
+def test_to_pandas_failure_retries_exhausted(api_key_str,
+                                             mocked_response,
+                                             fetch_path,
+                                             monkeypatch):
+    monkeypatch.setattr(TimeSeriesFinanceClient, '_FinanceRetryBackoff', 0)
 
-        assert ps.count() == 5416   # 1999-11-01 to 2021-05-11 (5416 business days) sé que hay 5416
+    if fetch_path == 'threads':
+        # requests.Session lanza RetryError al agotar los reintentos del HTTPAdapter
+        monkeypatch.setattr(mocked_response.session_get, 'side_effect',
+                            requests.exceptions.RetryError("Max retries exceeded"))
+    else:
+        # httpx devuelve la response 503 y el cliente reintenta la petición
+        monkeypatch.setattr(mocked_response.async_get, 'side_effect',
+                            lambda url: mock.Mock(status_code=503, headers={}))
+        calls = mocked_response.async_get.call_count
 
-        assert ps.count() == pandas_series_IBM_prices.count()
+    fc = TimeSeriesFinanceClient(["IBM"], api_key_str)
 
-        assert ps.equals(pandas_series_IBM_prices)
+    with pytest.raises(FinanceClientAPIError, match="status"):
+        fc.to_pandas()
 
+    if fetch_path == 'asyncio':
+        assert mocked_response.async_get.call_count - calls == TimeSeriesFinanceClient._FinanceRetries + 1
 
-def test_daily_price_dates(api_key_str,
-                           mocked_response,
-                           pandas_series_IBM_prices_filtered):
-    fc = TimeSeriesFinanceClient(["IBM", "IBM", "IBM", "IBM"], api_key_str)
 
-    l_ps = fc.daily_price(datetime.date(year=2021, month=1, day=1),
-                          datetime.date(year=2021, month=2, day=28),)
+@pytest.mark.slow
+def test_to_pandas_retry_success(api_key_str,
+                                 mocked_response,
+                                 monkeypatch,
+                                 pandas_series_IBM):
+    monkeypatch.setattr(TimeSeriesFinanceClient, '_FinanceRetryBackoff', 0)
 
-    for ps in l_ps:
+    responses = iter([mock.Mock(status_code=429, headers={})])
+    mocked_get = mocked_response.async_get.side_effect
+    monkeypatch.setattr(mocked_response.async_get, 'side_effect', lambda url: next(responses, None) or mocked_get(url))
 
-        assert ps.count() == 38   # 2021-01-04 to 2021-02-26 (38 business days)
+    fc = TimeSeriesFinanceClient(["IBM"], api_key_str)
 
-        assert ps.count() == pandas_series_IBM_prices_filtered.count()
+    assert fc.to_pandas()[0].equals(pandas_series_IBM)
 
-        assert ps.equals(pandas_series_IBM_prices_filtered)
 
+@pytest.mark.slow
+def test_to_pandas_httpx_success(api_key_str,
+                                 mocked_response,
+                                 monkeypatch,
+                                 pandas_series_IBM,
+                                 path_json):
+    httpx = pytest.importorskip("httpx")
 
-def test_to_pandas_success(api_key_str,
-                           mocked_response,
-                           pandas_series_IBM):
-    fc = TimeSeriesFinanceClient(["IBM", "IBM", "IBM", "IBM"], api_key_str)
+    # httpx real (_query_api_async con responses httpx) sobre un transporte simulado
+    content = path_json.read_bytes()
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, content=content))
+    monkeypatch.setattr(teii.finance.finance, 'httpx',
+                        SimpleNamespace(AsyncClient=functools.partial(httpx.AsyncClient, transport=transport)))
 
-    l_ps = fc.to_pandas()
+    fc = TimeSeriesFinanceClient(["IBM"], api_key_str)
 
-    for ps in l_ps:
+    assert fc.to_pandas()[0].equals(pandas_series_IBM)
+
+
+def test_constructor_failure_invalid_api_key():
+    with pytest.raises(FinanceClientInvalidAPIKey):
+        TimeSeriesFinanceClient(["IBM"])
+
+
+@pytest.mark.slow
+def test_constructor_batch_success(api_key_str,
+                                   mocked_response,
+                                   pandas_series_IBM):
+    class BatchTimeSeriesFinanceClient(TimeSeriesFinanceClient):
+        def _supports_batch(self):
+            return 3
+
+        def _build_batch_query_url_params(self, tickers):
+            return f"function=TIME_SERIES_DAILY_ADJUSTED&symbols={','.join(tickers)}&apikey={self._api_key}"
 
-        assert len(ps.index) == 5416
+        def _split_batch_response(self, response, tickers):
+            return [response.json()] * len(tickers)
 
-        assert len(ps.index) == len(pandas_series_IBM.index)
+    fc = BatchTimeSeriesFinanceClient(["IBM", "IBM", "IBM", "IBM"], api_key_str)
+
+    l_ps = fc.to_pandas()
+
+    assert len(l_ps) == 4
+
+    for ps in l_ps:
 
         assert ps.equals(pandas_series_IBM)
 
 
-def test_to_csv_success(api_key_str,
-                        mocked_response,
-                        path_csv,
-                        sandbox_root_path):
-    fc = TimeSeriesFinanceClient(["IBM"], api_key_str)
+@pytest.mark.slow
+def test_constructor_compact_dtypes_success(api_key_str,
+                                            mocked_response,
+                                            pandas_series_IBM):
+    fc = TimeSeriesFinanceClient(["IBM"], api_key_str, compact_dtypes=True)
 
-    fc.to_csv("test.csv")
+    ps = fc.to_pandas()[0]
 
-    assert filecmp.cmp("test.csv", path_csv, shallow=False)
+    assert ps['close'].dtype == np.float32
 
+    assert ps['volume'].dtype == np.int32
 
-def test_daily_volume_no_dates(api_key_str,
-                               mocked_response,
-                               pandas_series_IBM_volume):
-    fc = TimeSeriesFinanceClient(["IBM", "IBM", "IBM", "IBM"], api_key_str)
+    assert ps['volume'].equals(pandas_series_IBM['volume'].astype(np.int32))
 
-    l_ps = fc.daily_volume()
+    assert np.allclose(ps['close'].to_numpy(copy=False), pandas_series_IBM['close'].to_numpy(copy=False),
+                       rtol=np.finfo(np.float32).eps, atol=0)
 
-    for ps in l_ps:
 
-        assert ps.count() == 5416   # 1999-11-01 to 2021-05-11 (5416 business days) sé que hay 5416
+@pytest.mark.slow
+def test_constructor_used_fields_only_success(api_key_str,
+                                              mocked_response,
+                                              pandas_series_IBM):
+    fc = TimeSeriesFinanceClient(["IBM"], api_key_str, used_fields_only=True)
 
-        assert ps.count() == pandas_series_IBM_volume.count()
+    ps = fc.to_pandas()[0]
 
-        assert ps.equals(pandas_series_IBM_volume)
+    assert list(ps.columns) == list(TimeSeriesFinanceClient._USED_FIELDS)
 
+    assert ps.equals(pandas_series_IBM[list(TimeSeriesFinanceClient._USED_FIELDS)])
 
-def test_daily_volume_dates(api_key_str,
-                            mocked_response,
-                            pandas_series_IBM_volume_filtered):
-    fc = TimeSeriesFinanceClient(["IBM", "IBM", "IBM", "IBM"], api_key_str)
 
-    l_ps = fc.daily_volume(datetime.date(year=2021, month=1, day=1),
-                           datetime.date(year=2021, month=2, day=28),)
+@pytest.mark.slow
+@pytest.mark.parametrize("method,expected_fixture,exact", [
+    ("daily_price", "pandas_series_IBM_prices", True),  # 1999-11-01 to 2021-05-11 (5416 business days)
+    ("daily_volume", "pandas_series_IBM_volume", True),
+    ("yearly_dividends", "pandas_series_IBM_dividend", False),  # 1999 to 2021 (23 years)
+    ("yearly_dividends_per_quarter", "pandas_series_IBM_dividend_quarter", False),  # 1999-10 to 2021-04 (87 quarters)
+])
+def test_series_no_dates(request,
+                         ibm_client,
+                         method,
+                         expected_fixture,
+                         exact):
+    ref = request.getfixturevalue(expected_fixture)
 
-    for ps in l_ps:
+    ps = getattr(ibm_client, method)()[0]
 
-        assert ps.count() == 38   # 2021-01-04 to 2021-02-26 (38 business days)
+    assert ps.name == ref.series.name
 
-        assert ps.count() == pandas_series_IBM_volume_filtered.count()
+    assert ps.count() == ref.count
 
-        assert ps.equals(pandas_series_IBM_volume_filtered)
+    if exact:
+        _assert_series_equal(ps, ref)
+    else:
+        assert np.allclose(ps.to_numpy(copy=False), ref.np, rtol=1e-9, atol=1e-12)
 
 
-def test_daily_volume_dates_failure(api_key_str,
-                                    mocked_response):
-    fc = TimeSeriesFinanceClient(["IBM", "IBM", "IBM", "IBM"], api_key_str)
+@pytest.mark.slow
+@pytest.mark.parametrize("method,args,expected_fixture,exact", [
+    ("daily_price", (datetime.date(year=2021, month=1, day=1), datetime.date(year=2021, month=2, day=28)),
+     "pandas_series_IBM_prices_filtered", True),  # 2021-01-04 to 2021-02-26 (38 business days)
+    ("daily_volume", (datetime.date(year=2021, month=1, day=1), datetime.date(year=2021, month=2, day=28)),
+     "pandas_series_IBM_volume_filtered", True),
+    ("yearly_dividends", (2010, 2021),
+     "pandas_series_IBM_dividend_filtered", False),  # 2010 to 2021 (12 years)
+    ("yearly_dividends_per_quarter", (1999, 2007),
+     "pandas_series_IBM_dividend_quarter_filtered", False),  # 1999-10 to 2007 (33 quarters)
+])
+def test_series_dates(request,
+                      ibm_client,
+                      method,
+                      args,
+                      expected_fixture,
+                      exact):
+    ref = request.getfixturevalue(expected_fixture)
 
-    with pytest.raises(FinanceClientParamError):
-        fc.daily_volume(datetime.date(year=2021, month=1, day=1),
-                        datetime.date(year=2020, month=2, day=28),)
+    ps = getattr(ibm_client, method)(*args)[0]
 
+    assert ps.count() == ref.count
 
-def test_yearly_dividends_no_dates(api_key_str,
-                                   mocked_response,
-                                   pandas_series_IBM_dividend):
-    fc = TimeSeriesFinanceClient(["IBM", "IBM", "IBM", "IBM"], api_key_str)
+    if exact:
+        _assert_series_equal(ps, ref)
+    else:
+        assert np.allclose(ps.to_numpy(copy=False), ref.np, rtol=1e-9, atol=1e-12)
 
-    l_ps = fc.yearly_dividends()
 
-    for ps in l_ps:
+@pytest.mark.slow
+def test_to_pandas_success(ibm_client,
+                           pandas_series_IBM):
+    ps = ibm_client.to_pandas()[0]
 
-        assert ps.count() == 23   # 1999 to 2021 (23 years)
+    assert len(ps.index) == 5416
 
-        assert ps.count() == pandas_series_IBM_dividend.count()
+    assert len(ps.index) == len(pandas_series_IBM.index)
 
-        assert np.allclose(ps, pandas_series_IBM_dividend)
+    assert ps.equals(pandas_series_IBM)
 
 
-def test_yearly_dividends_dates(api_key_str,
+@pytest.mark.slow
+@pytest.mark.parametrize("n_tickers", [1, 4])
+def test_multi_ticker_broadcast(api_key_str,
                                 mocked_response,
-                                pandas_series_IBM_dividend_filtered):
-    fc = TimeSeriesFinanceClient(["IBM", "IBM", "IBM", "IBM"], api_key_str)
+                                fetch_path,
+                                pandas_series_IBM_prices,
+                                n_tickers):
+    session_get = mocked_response.session_get
+    calls = session_get.call_count
+
+    fc = TimeSeriesFinanceClient(["IBM"] * n_tickers, api_key_str)
 
-    l_ps = fc.yearly_dividends(2010, 2021)
+    l_ps = fc.daily_price()
+
+    # Sin httpx las peticiones van por la requests.Session del cliente
+    assert (session_get.call_count > calls) == (fetch_path == 'threads')
+
+    assert len(l_ps) == n_tickers
 
     for ps in l_ps:
 
-        assert ps.count() == 12  # 2010 to 2021 (12 years)
+        _assert_series_equal(ps, pandas_series_IBM_prices)
 
-        assert ps.count() == pandas_series_IBM_dividend_filtered.count()
 
-        assert np.allclose(ps, pandas_series_IBM_dividend_filtered)
+def test_cache_skips_invalid_payload(api_key_str,
+                                     fetch_path,
+                                     tmp_path,
+                                     monkeypatch):
+    monkeypatch.setattr(FileCache, 'DefaultPath', tmp_path)
 
+    fc = TimeSeriesFinanceClient(["THROTTLED"], api_key_str, cache=True)
 
-def test_yearly_dividens_dates_failure(api_key_str,
-                                       mocked_response):
-    fc = TimeSeriesFinanceClient(["IBM", "IBM", "IBM", "IBM"], api_key_str)
+    with pytest.raises(FinanceClientInvalidData):
+        fc.to_pandas()
 
-    with pytest.raises(FinanceClientParamError):
-        fc.yearly_dividends(datetime.date(year=2021, month=1, day=1),
-                            datetime.date(year=2020, month=2, day=28))
+    assert list(tmp_path.iterdir()) == []
 
 
-def test_yearly_dividends_quarter_no_dates(api_key_str,
-                                           mocked_response,
-                                           pandas_series_IBM_dividend_quarter):
-    fc = TimeSeriesFinanceClient(["IBM", "IBM", "IBM", "IBM"], api_key_str)
+@pytest.mark.slow
+def test_cache_stores_valid_payload(api_key_str,
+                                    fetch_path,
+                                    tmp_path,
+                                    monkeypatch,
+                                    pandas_series_IBM):
+    monkeypatch.setattr(FileCache, 'DefaultPath', tmp_path)
 
-    l_ps = fc.yearly_dividends_per_quarter()
+    TimeSeriesFinanceClient(["IBM"], api_key_str, cache=True).to_pandas()
 
-    for ps in l_ps:
+    l_meta = list(tmp_path.glob("*.meta"))
 
-        assert ps.count() == 87   # 1999-10 to 2021-04 (87 quarters)
+    assert len(l_meta) == 1
 
-        assert ps.count() == pandas_series_IBM_dividend_quarter.count()
+    assert api_key_str not in l_meta[0].read_text()
 
-        assert np.allclose(ps, pandas_series_IBM_dividend_quarter)
+    assert FileCache(tmp_path).get(TimeSeriesFinanceClient(["IBM"], api_key_str)._build_query_url("IBM")) is not None
 
 
-def test_yearly_dividends_quarter_dates(api_key_str,
-                                        mocked_response,
-                                        pandas_series_IBM_dividend_quarter_filtered):
-    fc = TimeSeriesFinanceClient(["IBM", "IBM", "IBM", "IBM"], api_key_str)
+def test_frame_cache_key_per_query(api_key_str,
+                                   mocked_response,
+                                   tmp_path,
+                                   monkeypatch):
+    monkeypatch.setattr(FileCache, 'DefaultPath', tmp_path)
 
-    l_ps = fc.yearly_dividends_per_quarter(1999, 2007)
+    l_fc = [TimeSeriesFinanceClient(["IBMFAST"], key, cache=True) for key in (api_key_str, api_key_str + "2")]
+    for fc in l_fc:
+        fc.to_pandas()
 
-    for ps in l_ps:
+    l_name = [fc._frame_cache_name("IBMFAST") for fc in l_fc]
 
-        assert ps.count() == 33   # 1999-10 to 2007 (33 quarters)
+    assert l_name[0] != l_name[1]
 
-        assert ps.count() == pandas_series_IBM_dividend_quarter_filtered.count()
+    assert l_name[0].endswith(FileCache._build_key(l_fc[0]._build_query_url("IBMFAST")))
 
-        assert np.allclose(ps, pandas_series_IBM_dividend_quarter_filtered)
+    assert sorted(p.stem for p in tmp_path.glob("*.parquet")) == sorted(l_name)
 
 
-def test_yearly_dividens_quarter_dates_failure(api_key_str,
-                                               mocked_response):
-    fc = TimeSeriesFinanceClient(["IBM", "IBM", "IBM", "IBM"], api_key_str)
+@pytest.mark.slow
+def test_to_csv_success(ibm_client,
+                        path_csv,
+                        tmp_path):
+    expected = path_csv.read_bytes()
 
-    with pytest.raises(FinanceClientParamError):
-        fc.yearly_dividends_per_quarter(datetime.date(year=2021, month=1, day=1),
-                                        datetime.date(year=2020, month=2, day=28))
+    buf = ibm_client.to_csv(io.BytesIO())
 
+    assert buf.getvalue() == expected
 
-def test_highest_daily_variation(api_key_str,
-                                 mocked_response):
-    fc = TimeSeriesFinanceClient(["IBM", "IBM", "IBM", "IBM"], api_key_str)
+    # Además, la escritura en disco produce los mismos bytes
+    path2file = ibm_client.to_csv(tmp_path / "test.csv")
 
-    l_t_fc = fc.highest_daily_variation()
+    assert path2file.read_bytes() == expected
 
-    for t_fc in l_t_fc:
 
-        dt = datetime.date(year=2020, month=3, day=16)
-        ts = pd.to_datetime(str(dt))
-        t = (ts, 107.41, 95.0, 12.409999999999997)
+@pytest.mark.parametrize("method,args", [
+    ("daily_volume", (datetime.date(year=2021, month=1, day=1), datetime.date(year=2020, month=2, day=28))),
+    ("yearly_dividends", (datetime.date(year=2021, month=1, day=1), datetime.date(year=2020, month=2, day=28))),
+    ("yearly_dividends_per_quarter", (datetime.date(year=2021, month=1, day=1),
+                                      datetime.date(year=2020, month=2, day=28))),
+])
+def test_param_error(ibm_client,
+                     method,
+                     args):
+    with pytest.raises(FinanceClientParamError):
+        getattr(ibm_client, method)(*args)
 
-        assert t == t_fc
 
+@pytest.mark.slow
+def test_highest_daily_variation(ibm_client):
+    ts, hi, lo, var = ibm_client.highest_daily_variation()[0]
 
-def test_highest_monthly_mean_variation(api_key_str,
-                                        mocked_response):
-    fc = TimeSeriesFinanceClient(["IBM", "IBM", "IBM", "IBM"], api_key_str)
+    assert ts == _EXPECTED_DAILY_VAR[0]
+
+    assert math.isclose(hi, _EXPECTED_DAILY_VAR[1], rel_tol=1e-12)
+
+    assert math.isclose(lo, _EXPECTED_DAILY_VAR[2], rel_tol=1e-12)
+
+    assert math.isclose(var, _EXPECTED_DAILY_VAR[3], abs_tol=1e-9)
 
-    l_t_fc = fc.highest_monthly_mean_variation()
 
-    for t_fc in l_t_fc:
+@pytest.mark.slow
+def test_highest_monthly_mean_variation(ibm_client):
+    ts, var = ibm_client.highest_monthly_mean_variation()[0]
 
-        dt = datetime.date(year=2020, month=3, day=1)
-        ts = pd.to_datetime(str(dt))
-        t = (ts, 6.833636363636362)
+    assert ts == _EXPECTED_MONTHLY_VAR[0]
 
-        assert t == t_fc
+    assert math.isclose(var, _EXPECTED_MONTHLY_VAR[1], rel_tol=1e-12)
@@ -0,0 +1,39 @@
+""" Fast unit tests for teii.finance.timeseries module (last 50 days of the IBM series) """
+
+
+import pytest
+
+
+@pytest.mark.parametrize("method,expected_fixture", [
+    ("daily_price", "pandas_series_IBM_prices"),
+    ("daily_volume", "pandas_series_IBM_volume"),
+])
+def test_series_fast(request,
+                     ibm_client_fast,
+                     method,
+                     expected_fixture):
+    ref = request.getfixturevalue(expected_fixture)
+
+    ps = getattr(ibm_client_fast, method)()[0]
+
+    assert ps.count() == 50   # 2021-03-02 to 2021-05-11 (50 business days)
+
+    assert ps.equals(ref.series.iloc[-50:])
+
+
+def test_to_pandas_fast(ibm_client_fast,
+                        pandas_series_IBM):
+    ps = ibm_client_fast.to_pandas()[0]
+
+    assert ps.equals(pandas_series_IBM.iloc[-50:])
+
+
+def test_highest_daily_variation_fast(ibm_client_fast,
+                                      pandas_series_IBM):
+    expected = pandas_series_IBM.iloc[-50:]
+
+    ts, hi, lo, var = ibm_client_fast.highest_daily_variation()[0]
+
+    assert ts == (expected['high'] - expected['low']).idxmax()
+
+    assert (hi, lo) == (expected.at[ts, 'high'], expected.at[ts, 'low'])